@@ -1,35 +1,361 @@
 import os
-import json
-import pickle
 import numpy as np
+import orjson
 from pathlib import Path
 import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 
 from sentence_transformers import SentenceTransformer
-import faiss
+import torch
 
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# where exported/quantized ONNX models are cached for the "onnx" backend
+ONNX_MODEL_DIR = Path(os.getenv("ONNX_MODEL_DIR", "./onnx_model"))
+
+# corpora larger than this are indexed with approximate HNSW instead of exact search
+ANN_MIN_VECTORS = int(os.getenv("ANN_MIN_VECTORS", "100000"))
+
+
+class OnnxEncoder:
+    """Int8-quantized ONNX Runtime encoder with a SentenceTransformer-style ``encode``.
+
+    The model is exported with ``optimum`` and dynamically quantized (AVX512-VNNI
+    config) on first use; later runs load the cached ``model_quantized.onnx``.
+    Pooling matches all-MiniLM-L6-v2: attention-masked mean of the last hidden state.
+    """
+
+    def __init__(self, model_name: str, cache_dir: Path = ONNX_MODEL_DIR, max_seq_length: int = 256):
+        # optional dependencies, only needed for the onnx backend
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        model_dir = Path(cache_dir) / model_name.replace("/", "__")
+        model_file = model_dir / "model_quantized.onnx"
+        if not model_file.exists():
+            self._export_quantized(model_name, model_dir)
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(str(model_file), options, providers=["CPUExecutionProvider"])
+        self.input_names = {inp.name for inp in self.session.get_inputs()}
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir, use_fast=True)
+        self.max_seq_length = max_seq_length
+
+    @staticmethod
+    def _export_quantized(model_name: str, model_dir: Path) -> None:
+        """Export the HF model to ONNX and write an int8 dynamically-quantized copy."""
+        from optimum.onnxruntime import ORTModelForFeatureExtraction, ORTQuantizer
+        from optimum.onnxruntime.configuration import AutoQuantizationConfig
+        from transformers import AutoTokenizer
+
+        model_id = model_name if "/" in model_name else f"sentence-transformers/{model_name}"
+        logger.info("Exporting %s to ONNX (int8) at %s", model_id, model_dir)
+
+        model = ORTModelForFeatureExtraction.from_pretrained(model_id, export=True)
+        quantizer = ORTQuantizer.from_pretrained(model)
+        qconfig = AutoQuantizationConfig.avx512_vnni(is_static=False, per_channel=False)
+        quantizer.quantize(save_dir=model_dir, quantization_config=qconfig)
+        AutoTokenizer.from_pretrained(model_id).save_pretrained(model_dir)
+
+    def encode(self, texts, batch_size: int = 32, normalize_embeddings: bool = False, **_kwargs):
+        """Encode texts to a (len(texts), dim) float32 array.
+
+        Texts are tokenized once and batched in token-length order so each batch
+        pads to a similar length; rows are returned in the original order.
+        """
+        encoded = self.tokenizer(list(texts), truncation=True, max_length=self.max_seq_length)
+        order = np.argsort([len(ids) for ids in encoded["input_ids"]], kind="stable")
+
+        embeddings = None
+        for start in range(0, len(order), batch_size):
+            rows = order[start : start + batch_size]
+            features = self.tokenizer.pad(
+                {name: [encoded[name][i] for i in rows] for name in encoded.keys()},
+                return_tensors="np",
+            )
+            inputs = {name: value for name, value in features.items() if name in self.input_names}
+            hidden = self.session.run(None, inputs)[0]
+
+            # attention-masked mean pooling
+            mask = features["attention_mask"][..., None].astype(np.float32)
+            pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+
+            if embeddings is None:
+                embeddings = np.empty((len(order), pooled.shape[1]), dtype=np.float32)
+            embeddings[rows] = pooled
+
+        if normalize_embeddings:
+            embeddings = _normalize_rows(embeddings, copy=False)
+        return embeddings
+
+
+def _read_chunk_file(doc_id: str, path: Path) -> list:
+    """Parse a ``<doc_id>.jsonl`` shard or a legacy ``chunk_<i>.json`` file into chunk
+    dicts. Unreadable records (one JSONL line or one legacy file) are logged and skipped.
+    """
+    try:
+        data = path.read_bytes()
+    except OSError as e:  # pragma: no cover - defensive logging
+        logger.error("Error loading %s: %s", path, e)
+        return []
+
+    records = data.splitlines() if path.suffix == ".jsonl" else [data]
+    chunks = []
+    for line_no, record in enumerate(records, 1):
+        if not record.strip():
+            continue
+        try:
+            chunk_data = orjson.loads(record)
+            # add convenience ID for downstream reference
+            chunk_data["chunk_id"] = f"{doc_id}_chunk_{chunk_data['chunk_index']}"
+            chunks.append(chunk_data)
+        except Exception as e:
+            logger.error("Error loading %s (record %d): %s", path, line_no, e)
+    return chunks
+
+
+def _replace_atomically(path: Path, write) -> None:
+    """Call ``write(tmp_path)`` on a temp file next to ``path``, then ``os.replace`` it
+    over ``path``. Processes that memory-mapped the previous file keep reading its
+    (unlinked) inode instead of seeing it truncated and rewritten underneath them."""
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+
+
+def _save_npy(path: Path, array: np.ndarray) -> None:
+    # np.save appends .npy to names without it; write through a handle to keep ``path``
+    with open(path, "wb") as f:
+        np.save(f, array)
+
+
+def _normalize_rows(embeddings, copy: bool = True) -> np.ndarray:
+    """Return ``embeddings`` as float32 with L2-normalized rows (zero rows stay zero).
+
+    With ``copy=False`` a float32 input is normalized in place. Row norms come from
+    one einsum pass, so no N x dim temporary is allocated.
+    """
+    if copy:
+        normalized = np.array(embeddings, dtype=np.float32, ndmin=2)
+    else:
+        normalized = np.atleast_2d(np.asarray(embeddings, dtype=np.float32))
+    norms = np.einsum("ij,ij->i", normalized, normalized)
+    np.sqrt(norms, out=norms)
+    np.maximum(norms, 1e-12, out=norms)
+    np.reciprocal(norms, out=norms)
+    normalized *= norms[:, None]
+    return normalized
+
+
+class TorchFlatIndex:
+    """Exact inner-product index over a dense float16 matrix.
+
+    Search is ``torch.mm`` + ``torch.topk``, which keeps BLAS busy far better than
+    ``faiss.IndexFlatIP`` on CPU. Vectors are stored as float16 to halve the bytes
+    streamed per query and upcast to float32 one cache-sized block at a time.
+    ``vectors`` may be a copy-on-write memory map (see ``EmbeddingIndexer.load_index``).
+    Exposes the subset of the FAISS index interface used here (``ntotal``, ``add``,
+    ``search``).
+    """
+
+    dtype = np.float16
+    block_rows = 4096  # 4096 x 384 float32 upcast buffer ~ 6 MB
+
+    def __init__(self, dimension: int, vectors: np.ndarray | None = None):
+        self.d = dimension
+        self.vectors = np.empty((0, dimension), dtype=self.dtype) if vectors is None else vectors
+
+    @property
+    def ntotal(self) -> int:
+        return len(self.vectors)
+
+    def add(self, vectors: np.ndarray) -> None:
+        vectors = np.ascontiguousarray(vectors, dtype=self.dtype)
+        self.vectors = vectors if self.ntotal == 0 else np.concatenate([self.vectors, vectors])
+
+    def search(self, queries: np.ndarray, k: int, ids: np.ndarray | None = None):
+        """Return (scores, indices) arrays of shape (len(queries), k).
+
+        If ``ids`` is given, only those rows are scored (the role of a FAISS
+        ``IDSelector``); returned indices still refer to rows of the full index.
+        """
+        matrix = torch.from_numpy(self.vectors if ids is None else self.vectors[ids])
+        query = torch.from_numpy(np.ascontiguousarray(queries, dtype=np.float32))
+
+        scores = torch.empty((query.shape[0], len(matrix)), dtype=torch.float32)
+        for start in range(0, len(matrix), self.block_rows):
+            block = matrix[start : start + self.block_rows].float()
+            scores[:, start : start + len(block)] = torch.mm(query, block.T)
+
+        values, indices = torch.topk(scores, min(k, len(matrix)), dim=1)
+        indices = indices.numpy()
+        return values.numpy(), indices if ids is None else ids[indices]
+
+
+class HNSWIndex:
+    """Approximate inner-product index (FAISS ``IndexHNSWFlat``) for large corpora.
+
+    Queries are sub-linear in the number of vectors at ~99% recall for MiniLM
+    embeddings. Mirrors the ``TorchFlatIndex`` interface; ``ids``-filtered searches
+    are exact over the selected rows.
+    """
+
+    M = 32
+    ef_construction = 200
+    ef_search = 64
+
+    def __init__(self, dimension: int, index=None):
+        import faiss  # only needed for large corpora
+
+        if index is None:
+            index = faiss.IndexHNSWFlat(dimension, self.M, faiss.METRIC_INNER_PRODUCT)
+            index.hnsw.efConstruction = self.ef_construction
+        index.hnsw.efSearch = self.ef_search
+        self.d = dimension
+        self.index = index
+
+    @property
+    def ntotal(self) -> int:
+        return self.index.ntotal
+
+    def add(self, vectors: np.ndarray) -> None:
+        self.index.add(np.ascontiguousarray(vectors, dtype=np.float32))
+
+    def search(self, queries: np.ndarray, k: int, ids: np.ndarray | None = None):
+        """Return (scores, indices) arrays of shape (len(queries), k); missing hits are -1.
+
+        If ``ids`` is given, those rows are scored exactly instead of walking the graph:
+        a filter matching a tiny fraction of the corpus would leave a filtered HNSW
+        search with fewer than k hits, often none.
+        """
+        queries = np.ascontiguousarray(queries, dtype=np.float32)
+        if ids is None:
+            return self.index.search(queries, k)
+
+        ids = np.ascontiguousarray(ids, dtype=np.int64)
+        scores = queries @ self.index.reconstruct_batch(ids).T
+        top = np.argsort(-scores, axis=1, kind="stable")[:, : min(k, len(ids))]
+        return np.take_along_axis(scores, top, axis=1), ids[top]
+
+
+class ChunkMetadata:
+    """Structure-of-arrays chunk metadata, row-aligned with the vector index.
+
+    Each field is one typed NumPy column; chunk texts live in a single UTF-8 byte
+    buffer addressed by an offsets array. Rows are materialized as dicts only for
+    returned hits, and filters run as array comparisons. Persisted with ``np.savez``
+    (no pickle). Missing integer fields are stored as -1, missing strings as "".
+    """
+
+    str_fields = ("doc_id", "chunk_id", "source")
+    int_fields = ("chunk_index", "start_offset", "end_offset", "page")
+
+    def __init__(self, columns: dict):
+        self.columns = columns
+        self._rows_by_doc = None
+
+    @classmethod
+    def from_chunks(cls, chunks) -> "ChunkMetadata":
+        columns = {}
+        for name in cls.str_fields:
+            columns[name] = np.array([chunk.get(name) or "" for chunk in chunks], dtype=str)
+        for name in cls.int_fields:
+            values = [chunk.get(name) for chunk in chunks]
+            columns[name] = np.array([-1 if v is None else v for v in values], dtype=np.int64)
+
+        encoded = [chunk.get("text", "").encode("utf-8") for chunk in chunks]
+        columns["text_offsets"] = np.cumsum([0] + [len(t) for t in encoded], dtype=np.int64)
+        columns["text"] = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+        return cls(columns)
+
+    @classmethod
+    def load(cls, path: Path) -> "ChunkMetadata":
+        with np.load(path, allow_pickle=False) as data:
+            return cls({name: data[name] for name in data.files})
+
+    def save(self, path: Path) -> None:
+        # np.savez appends .npz to bare names; write through a handle to keep ``path``
+        with open(path, "wb") as f:
+            np.savez(f, **self.columns)
+
+    def __len__(self) -> int:
+        return len(self.columns["text_offsets"]) - 1
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.columns[name]
+
+    def rows_for_doc(self, doc_id: str) -> np.ndarray:
+        """Row indices belonging to ``doc_id`` (grouped once, on first call)."""
+        if self._rows_by_doc is None:
+            doc_ids = self.columns["doc_id"]
+            order = np.argsort(doc_ids, kind="stable")
+            unique, starts = np.unique(doc_ids[order], return_index=True)
+            self._rows_by_doc = dict(zip(unique.tolist(), np.split(order, starts[1:])))
+        return self._rows_by_doc.get(doc_id, np.empty(0, dtype=np.int64))
+
+    def row(self, idx: int) -> dict:
+        """Materialize row ``idx`` as a chunk dict."""
+        start, end = self.columns["text_offsets"][idx : idx + 2]
+        chunk = {"text": self.columns["text"][start:end].tobytes().decode("utf-8")}
+        for name in self.str_fields:
+            chunk[name] = str(self.columns[name][idx]) or None
+        for name in self.int_fields:
+            value = int(self.columns[name][idx])
+            chunk[name] = None if value < 0 else value
+        return chunk
+
 
 class EmbeddingIndexer:
-    def __init__(self, model_name: str = "all-MiniLM-L6-v2", index_path: str = "./vector_index"):
-        """Initialize embedding model and FAISS index location."""
-        logger.info("Initializing EmbeddingIndexer with model: %s", model_name)
-        self.model = SentenceTransformer(model_name)
+    query_cache_size = 1024  # normalized query embeddings kept for repeated queries
+
+    def __init__(
+        self,
+        model_name: str = "all-MiniLM-L6-v2",
+        index_path: str = "./vector_index",
+        backend: str = os.getenv("EMBEDDING_BACKEND", "torch"),
+    ):
+        """Initialize embedding model and vector index location.
+
+        ``backend`` is ``"torch"`` (SentenceTransformer) or ``"onnx"`` (int8 ONNX Runtime).
+        The torch backend runs in float16 on CUDA when a GPU is available.
+        """
+        logger.info("Initializing EmbeddingIndexer with model: %s (backend=%s)", model_name, backend)
+        self.device = "cpu"
+        if backend == "onnx":
+            self.model = OnnxEncoder(model_name)
+        elif backend == "torch":
+            self.device = "cuda" if torch.cuda.is_available() else "cpu"
+            self.model = SentenceTransformer(model_name, device=self.device)
+            if self.device == "cuda":
+                self.model.half()
+        else:
+            raise ValueError(f"Unsupported embedding backend: {backend}")
         self.index_path = Path(index_path)
         self.index_path.mkdir(exist_ok=True)
 
-        # FAISS index and metadata storage
+        # vector index and metadata storage
         self.index = None
-        self.chunk_metadata = []  # keep metadata order aligned with FAISS index
+        self.chunk_metadata = ChunkMetadata.from_chunks([])  # rows aligned with index rows
         self.dimension = 384  # embedding dimension for all-MiniLM-L6-v2
+        self._query_cache = OrderedDict()  # LRU: stripped query text -> embedding
+        self._query_cache_lock = threading.Lock()
 
     def load_chunks(self, chunks_dir: str = "./storage/chunks"):
-        """Load chunk JSON files produced by Person 2.
+        """Load chunks produced by Person 2.
 
-        Expected structure:
+        Expected structure (one JSON object per line, in chunk order):
+            storage/chunks/<doc_id>.jsonl
+
+        Legacy per-chunk folders are still read:
             storage/chunks/<doc_id>/chunk_0.json
             storage/chunks/<doc_id>/chunk_1.json
             ...
@@ -41,28 +367,25 @@ class EmbeddingIndexer:
             logger.warning("%s does not exist. Make sure Person 2 ran ingestion.", chunks_dir)
             return chunks
 
-        # walk through all doc_id folders
-        for doc_folder in chunks_path.iterdir():
-            if doc_folder.is_dir():
-                doc_id = doc_folder.name
-                logger.info("Loading chunks from doc_id: %s", doc_id)
-
+        # collect (doc_id, file) pairs first, in document and chunk order
+        files = []
+        for entry in sorted(chunks_path.iterdir()):
+            if entry.is_file() and entry.suffix == ".jsonl":
+                files.append((entry.stem, entry))
+            elif entry.is_dir():
                 # load all chunk_*.json files ordered by index
                 chunk_files = sorted(
-                    doc_folder.glob("chunk_*.json"),
+                    entry.glob("chunk_*.json"),
                     key=lambda x: int(x.stem.split("_")[1]),
                 )
+                files.extend((entry.name, chunk_file) for chunk_file in chunk_files)
 
-                for chunk_file in chunk_files:
-                    try:
-                        with open(chunk_file, "r", encoding="utf-8") as f:
-                            chunk_data = json.load(f)
-
-                        # add convenience ID for downstream reference
-                        chunk_data["chunk_id"] = f"{doc_id}_chunk_{chunk_data['chunk_index']}"
-                        chunks.append(chunk_data)
-                    except Exception as e:  # pragma: no cover - defensive logging
-                        logger.error("Error loading %s: %s", chunk_file, e)
+        # overlap file reads across threads; map keeps the input order
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            doc_ids = [doc_id for doc_id, _ in files]
+            paths = [path for _, path in files]
+            for doc_chunks in executor.map(_read_chunk_file, doc_ids, paths):
+                chunks.extend(doc_chunks)
 
         logger.info("Loaded %d chunks from %s", len(chunks), chunks_dir)
         return chunks
@@ -73,36 +396,85 @@ class EmbeddingIndexer:
             logger.warning("No chunks to embed.")
             return np.array([])
 
-        texts = [chunk["text"] for chunk in chunks]
+        # encode each distinct text once (repeated headers/footers/boilerplate)
+        # and scatter the rows back to chunk order
+        unique_rows = {}
+        inverse = np.array([unique_rows.setdefault(chunk["text"], len(unique_rows)) for chunk in chunks])
+        texts = list(unique_rows)
 
-        logger.info("Generating embeddings for %d chunks...", len(texts))
-        embeddings = self.model.encode(
-            texts,
-            show_progress_bar=True,
-            batch_size=32,
-            convert_to_numpy=True,
-            normalize_embeddings=False,  # normalized later for FAISS search
-        )
+        logger.info("Generating embeddings for %d chunks (%d unique texts)...", len(chunks), len(texts))
+        if self.device == "cuda":
+            embeddings = self._encode_prefetched(texts, batch_size=128)
+        else:
+            embeddings = self.model.encode(
+                texts,
+                show_progress_bar=True,
+                batch_size=32,
+                convert_to_numpy=True,
+                normalize_embeddings=False,  # normalized later in build_index
+            )
+        embeddings = np.asarray(embeddings)[inverse]
 
         logger.info("Generated embeddings with shape: %s", embeddings.shape)
         return embeddings
 
-    def build_index(self, embeddings, chunks):
-        """Build FAISS index from embeddings."""
+    def _encode_prefetched(self, texts, batch_size: int, num_workers: int = 4) -> np.ndarray:
+        """Encode texts on the GPU while DataLoader workers tokenize, pad and pin the
+        next batches, so CPU tokenization and host-to-device copies overlap the forward
+        pass. Batches are length-sorted as in ``OnnxEncoder.encode``; rows come back
+        in the original order, un-normalized."""
+        from torch.utils.data import DataLoader
+
+        order = np.argsort([len(text) for text in texts], kind="stable")
+        tokenize = partial(
+            self.model.tokenizer,
+            padding=True,
+            truncation=True,
+            max_length=self.model.max_seq_length,
+            return_tensors="pt",
+        )
+        loader = DataLoader(
+            [texts[i] for i in order],
+            batch_size=batch_size,
+            collate_fn=tokenize,
+            num_workers=num_workers,
+            pin_memory=True,
+            prefetch_factor=2,
+        )
+
+        embeddings = np.empty((len(texts), self.dimension), dtype=np.float32)
+        start = 0
+        with torch.inference_mode():
+            for features in loader:
+                features = {name: value.to(self.device, non_blocking=True) for name, value in features.items()}
+                pooled = self.model(features)["sentence_embedding"]
+                rows = order[start : start + len(pooled)]
+                embeddings[rows] = pooled.float().cpu().numpy()
+                start += len(pooled)
+        return embeddings
+
+    def build_index(self, embeddings, chunks, inplace: bool = False):
+        """Build an inner-product index from embeddings: exact below ``ANN_MIN_VECTORS``
+        vectors, HNSW above.
+
+        With ``inplace=True`` a float32 ``embeddings`` buffer is normalized in place
+        instead of copied; pass it when the caller no longer needs the raw vectors
+        (e.g. straight from ``embed_chunks``).
+        """
         if len(embeddings) == 0:
             logger.warning("No embeddings to index.")
             return
 
-        self.index = faiss.IndexFlatIP(self.dimension)
+        if len(embeddings) > ANN_MIN_VECTORS:
+            self.index = HNSWIndex(self.dimension)
+        else:
+            self.index = TorchFlatIndex(self.dimension)
 
         # normalize embeddings for cosine similarity
-        embeddings_normalized = embeddings.copy()
-        faiss.normalize_L2(embeddings_normalized)
-
-        self.index.add(embeddings_normalized)
-        self.chunk_metadata = chunks
+        self.index.add(_normalize_rows(embeddings, copy=not inplace))
+        self.chunk_metadata = ChunkMetadata.from_chunks(chunks)
 
-        logger.info("Built FAISS index with %d vectors", self.index.ntotal)
+        logger.info("Built vector index with %d vectors", self.index.ntotal)
 
     def save_index(self):
         """Persist index and metadata to disk."""
@@ -110,12 +482,20 @@ class EmbeddingIndexer:
             logger.warning("No index to save.")
             return
 
-        index_file = self.index_path / "faiss.index"
-        metadata_file = self.index_path / "metadata.pkl"
+        flat_file = self.index_path / "vectors.npy"
+        hnsw_file = self.index_path / "hnsw.faiss"
+        metadata_file = self.index_path / "metadata.npz"
 
-        faiss.write_index(self.index, str(index_file))
-        with open(metadata_file, "wb") as f:
-            pickle.dump(self.chunk_metadata, f)
+        if isinstance(self.index, HNSWIndex):
+            import faiss
+
+            index_file, stale_file = hnsw_file, flat_file
+            _replace_atomically(index_file, lambda tmp: faiss.write_index(self.index.index, str(tmp)))
+        else:
+            index_file, stale_file = flat_file, hnsw_file
+            _replace_atomically(index_file, lambda tmp: _save_npy(tmp, self.index.vectors))
+        stale_file.unlink(missing_ok=True)  # left over from a differently sized corpus
+        _replace_atomically(metadata_file, self.chunk_metadata.save)
 
         logger.info("Saved index to %s", self.index_path)
         logger.info("  - Index file: %s", index_file)
@@ -123,47 +503,97 @@ class EmbeddingIndexer:
 
     def load_index(self):
         """Load existing index and metadata."""
-        index_file = self.index_path / "faiss.index"
-        metadata_file = self.index_path / "metadata.pkl"
-
-        if not index_file.exists():
+        index_file = self.index_path / "vectors.npy"
+        hnsw_file = self.index_path / "hnsw.faiss"
+        legacy_index_file = self.index_path / "faiss.index"
+        metadata_file = self.index_path / "metadata.npz"
+        legacy_metadata_file = self.index_path / "metadata.pkl"
+
+        if hnsw_file.exists():
+            import faiss
+
+            self.index = HNSWIndex(self.dimension, faiss.read_index(str(hnsw_file)))
+        elif index_file.exists():
+            # memory-mapped: pages come from the OS page cache and are shared by
+            # every worker process that loads the same index. The mapping is only
+            # safe because save_index never rewrites this file in place (it
+            # os.replace()s a new inode over it, see _replace_atomically).
+            # Copy-on-write ("c") rather than read-only so torch.from_numpy can wrap
+            # it; this process never writes to it.
+            self.index = TorchFlatIndex(self.dimension, np.load(index_file, mmap_mode="c"))
+        elif legacy_index_file.exists():
+            # indexes saved before the torch flat index were a faiss.IndexFlatIP of
+            # normalized vectors: convert once to vectors.npy
+            import faiss
+
+            logger.warning("Converting legacy FAISS index %s to %s", legacy_index_file, index_file)
+            legacy_index = faiss.read_index(str(legacy_index_file))
+            self.index = TorchFlatIndex(self.dimension)
+            self.index.add(legacy_index.reconstruct_n(0, legacy_index.ntotal))
+            _replace_atomically(index_file, lambda tmp: _save_npy(tmp, self.index.vectors))
+        else:
             logger.warning("No existing index found at %s", index_file)
             return False
 
-        self.index = faiss.read_index(str(index_file))
-        with open(metadata_file, "rb") as f:
-            self.chunk_metadata = pickle.load(f)
+        if metadata_file.exists():
+            self.chunk_metadata = ChunkMetadata.load(metadata_file)
+        elif legacy_metadata_file.exists():
+            # indexes saved before the columnar store pickled a list of chunk dicts:
+            # convert once to metadata.npz
+            import pickle
+
+            logger.warning("Converting legacy metadata %s to %s", legacy_metadata_file, metadata_file)
+            with open(legacy_metadata_file, "rb") as f:
+                self.chunk_metadata = ChunkMetadata.from_chunks(pickle.load(f))
+            _replace_atomically(metadata_file, self.chunk_metadata.save)
+        else:
+            logger.warning("No metadata found at %s; re-run indexing", metadata_file)
+            self.index = None
+            return False
 
         logger.info("Loaded index with %d vectors", self.index.ntotal)
         return True
 
+    def _encode_query(self, query_text: str) -> np.ndarray:
+        """Return the L2-normalized (1, dim) embedding of a query, LRU-cached by its
+        stripped text. Case is kept, since the configured model may be cased.
+        Safe to call from concurrent request threads."""
+        key = query_text.strip()
+        with self._query_cache_lock:
+            embedding = self._query_cache.get(key)
+            if embedding is not None:
+                self._query_cache.move_to_end(key)
+                return embedding.copy()
+
+        # encode outside the lock; a concurrent miss on the same key just encodes twice
+        embedding = _normalize_rows(self.model.encode([key], convert_to_numpy=True), copy=False)
+        with self._query_cache_lock:
+            self._query_cache[key] = embedding
+            self._query_cache.move_to_end(key)
+            if len(self._query_cache) > self.query_cache_size:
+                self._query_cache.popitem(last=False)
+        return embedding.copy()
+
     def search(self, query_text, k: int = 5, filters=None):
         """Search for top-k most similar chunks."""
         if self.index is None or self.index.ntotal == 0:
             logger.warning("Index is empty or not loaded.")
             return []
 
-        query_embedding = self.model.encode([query_text], convert_to_numpy=True)
-        faiss.normalize_L2(query_embedding)
+        query_embedding = self._encode_query(query_text)
 
-        search_k = k * 3 if filters else k
-        scores, indices = self.index.search(query_embedding, min(search_k, self.index.ntotal))
+        # score only the filtered document's rows so k results are exact
+        ids = None
+        if filters and "doc_id" in filters:
+            ids = self.chunk_metadata.rows_for_doc(filters["doc_id"])
+        scores, indices = self.index.search(query_embedding, k, ids=ids)
 
+        valid = (indices[0] >= 0) & (indices[0] < len(self.chunk_metadata))
         results = []
-        for idx, score in zip(indices[0], scores[0]):
-            if idx < 0 or idx >= len(self.chunk_metadata):
-                continue
-
-            chunk = self.chunk_metadata[idx].copy()
+        for idx, score in zip(indices[0][valid].tolist(), scores[0][valid].tolist()):
+            chunk = self.chunk_metadata.row(idx)
             chunk["score"] = float(score)
-
-            if filters:
-                if "doc_id" in filters and chunk.get("doc_id") != filters["doc_id"]:
-                    continue
-
             results.append(chunk)
-            if len(results) >= k:
-                break
 
         logger.info("Search returned %d results for query: '%s...'", len(results), query_text[:50])
         return results
@@ -183,9 +613,7 @@ def main():
     if not chunks:
         print("\n❌ ERROR: No chunks found!")
         print("Make sure Person 2 has run ingestion and chunks exist at:")
-        print("  storage/chunks/<doc_id>/chunk_0.json")
-        print("  storage/chunks/<doc_id>/chunk_1.json")
-        print("  ...")
+        print("  storage/chunks/<doc_id>.jsonl")
         return
 
     print(f"✅ Loaded {len(chunks)} chunks")
@@ -201,8 +629,8 @@ def main():
     embeddings = indexer.embed_chunks(chunks)
     print(f"✅ Generated embeddings with shape: {embeddings.shape}")
 
-    print("\n[3/4] Building FAISS index...")
-    indexer.build_index(embeddings, chunks)
+    print("\n[3/4] Building vector index...")
+    indexer.build_index(embeddings, chunks, inplace=True)
     print(f"✅ Built index with {indexer.index.ntotal} vectors")
 
     print("\n[4/4] Saving index to disk...")
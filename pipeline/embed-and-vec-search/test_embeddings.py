@@ -117,8 +117,8 @@ class TestEmbeddingIndexer(unittest.TestCase):
         self.indexer.build_index(embeddings, chunks)
         self.indexer.save_index()
 
-        index_file = self.index_dir / "faiss.index"
-        metadata_file = self.index_dir / "metadata.pkl"
+        index_file = self.index_dir / "vectors.npy"
+        metadata_file = self.index_dir / "metadata.npz"
         self.assertTrue(index_file.exists(), "Index file should exist")
         self.assertTrue(metadata_file.exists(), "Metadata file should exist")
 
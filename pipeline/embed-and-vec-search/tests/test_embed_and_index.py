@@ -1,3 +1,5 @@
+import json
+import pickle
 import numpy as np
 import pytest
 from pathlib import Path
@@ -23,6 +25,42 @@ def test_load_chunks(sample_chunks_dir: Path):
     assert chunks[0]["chunk_id"].startswith("doc1")
 
 
+def test_load_chunks_jsonl(tmp_path: Path):
+    chunks_dir = tmp_path / "chunks"
+    chunks_dir.mkdir()
+    lines = [json.dumps({"doc_id": "doc2", "chunk_index": i, "text": f"text {i}"}) for i in range(2)]
+    (chunks_dir / "doc2.jsonl").write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+    indexer = EmbeddingIndexer(index_path=str(tmp_path / "index"))
+    chunks = indexer.load_chunks(str(chunks_dir))
+    assert [c["chunk_id"] for c in chunks] == ["doc2_chunk_0", "doc2_chunk_1"]
+
+
+def test_load_chunks_skips_bad_records(tmp_path: Path):
+    chunks_dir = tmp_path / "chunks"
+    (chunks_dir / "doc1").mkdir(parents=True)
+    (chunks_dir / "doc1" / "chunk_0.json").write_text(json.dumps({"text": "no index"}), encoding="utf-8")
+    lines = [json.dumps({"doc_id": "doc2", "chunk_index": 0, "text": "a"}), "{not json", "[1, 2]",
+             json.dumps({"doc_id": "doc2", "chunk_index": 1, "text": "b"})]
+    (chunks_dir / "doc2.jsonl").write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+    indexer = EmbeddingIndexer(index_path=str(tmp_path / "index"))
+    chunks = indexer.load_chunks(str(chunks_dir))
+    assert [c["chunk_id"] for c in chunks] == ["doc2_chunk_0", "doc2_chunk_1"]
+
+
+def test_load_chunks_keeps_chunk_order(tmp_path: Path):
+    doc_dir = tmp_path / "chunks" / "doc3"
+    doc_dir.mkdir(parents=True)
+    for i in range(12):
+        chunk = {"doc_id": "doc3", "chunk_index": i, "text": f"text {i}"}
+        (doc_dir / f"chunk_{i}.json").write_text(json.dumps(chunk), encoding="utf-8")
+
+    indexer = EmbeddingIndexer(index_path=str(tmp_path / "index"))
+    chunks = indexer.load_chunks(str(tmp_path / "chunks"))
+    assert [c["chunk_index"] for c in chunks] == list(range(12))
+
+
 def test_build_and_search(sample_chunks_dir: Path, tmp_path: Path):
     indexer = EmbeddingIndexer(index_path=str(tmp_path / "index"))
     chunks = indexer.load_chunks(str(sample_chunks_dir))
@@ -36,6 +74,217 @@ def test_build_and_search(sample_chunks_dir: Path, tmp_path: Path):
     loaded = EmbeddingIndexer(index_path=str(tmp_path / "index"))
     loaded.model = DummyModel()
     assert loaded.load_index()
+    assert isinstance(loaded.index.vectors, np.memmap)
     results = loaded.search("query", k=1)
     assert len(results) == 1
 
+
+
+def test_chunk_metadata_roundtrip(tmp_path: Path):
+    chunks = [
+        {"doc_id": "doc1", "chunk_id": "doc1_chunk_0", "chunk_index": 0, "text": "héllo", "page": None, "source": "a.txt"},
+        {"doc_id": "doc2", "chunk_id": "doc2_chunk_0", "chunk_index": 0, "text": "world", "page": 3, "source": None},
+    ]
+    module.ChunkMetadata.from_chunks(chunks).save(tmp_path / "metadata.npz")
+    meta = module.ChunkMetadata.load(tmp_path / "metadata.npz")
+
+    assert len(meta) == 2
+    assert list(meta["doc_id"] == "doc2") == [False, True]
+    row = meta.row(0)
+    assert (row["text"], row["page"], row["source"]) == ("héllo", None, "a.txt")
+    assert meta.row(1)["source"] is None
+
+
+def test_search_doc_filter_scores_only_doc_rows(tmp_path: Path):
+    chunks = [{"doc_id": f"doc{i % 2}", "chunk_index": i, "text": f"text {i}"} for i in range(6)]
+    indexer = EmbeddingIndexer(index_path=str(tmp_path / "index"))
+    indexer.build_index(np.random.default_rng(0).normal(size=(6, 384)), chunks)
+
+    results = indexer.search("query", k=5, filters={"doc_id": "doc1"})
+    assert sorted(r["chunk_index"] for r in results) == [1, 3, 5]
+    assert indexer.search("query", k=5, filters={"doc_id": "missing"}) == []
+
+
+def test_search_caches_query_embeddings(sample_chunks_dir: Path, tmp_path: Path):
+    indexer = EmbeddingIndexer(index_path=str(tmp_path / "index"))
+    chunks = indexer.load_chunks(str(sample_chunks_dir))
+    indexer.build_index(indexer.embed_chunks(chunks), chunks)
+
+    calls = []
+    encode = indexer.model.encode
+    indexer.model.encode = lambda texts, **kwargs: calls.append(texts) or encode(texts, **kwargs)
+    indexer.search("GMP rules", k=1)
+    indexer.search("  GMP rules ", k=1)
+    indexer.search("gmp rules", k=1)
+    assert calls == [["GMP rules"], ["gmp rules"]]
+
+    # cached rows are handed out as writable copies (torch.from_numpy needs that)
+    embedding = indexer._encode_query("GMP rules")
+    assert embedding.flags.writeable
+    assert embedding is not indexer._encode_query("GMP rules")
+
+
+def test_embed_chunks_encodes_duplicates_once(tmp_path: Path):
+    indexer = EmbeddingIndexer(index_path=str(tmp_path / "index"))
+    calls = []
+    encode = indexer.model.encode
+    indexer.model.encode = lambda texts, **kwargs: calls.append(texts) or encode(texts, **kwargs)
+
+    chunks = [{"text": t} for t in ["header", "body", "header"]]
+    embeddings = indexer.embed_chunks(chunks)
+    assert calls == [["header", "body"]]
+    assert embeddings.shape == (3, 384)
+    assert np.array_equal(embeddings[0], embeddings[2])
+
+
+def test_normalize_rows_in_place():
+    embeddings = np.array([[3.0, 4.0], [0.0, 0.0]], dtype=np.float32)
+    normalized = module._normalize_rows(embeddings, copy=False)
+    assert normalized is embeddings
+    assert np.allclose(normalized, [[0.6, 0.8], [0.0, 0.0]])
+
+
+def test_build_index_uses_hnsw_above_threshold(monkeypatch, tmp_path: Path):
+    pytest.importorskip("faiss")
+    monkeypatch.setattr(module, "ANN_MIN_VECTORS", 4)
+    chunks = [{"doc_id": f"doc{i % 2}", "chunk_index": i, "text": f"text {i}"} for i in range(8)]
+    indexer = EmbeddingIndexer(index_path=str(tmp_path / "index"))
+    indexer.build_index(np.random.default_rng(0).normal(size=(8, 384)), chunks)
+    indexer.save_index()
+    assert isinstance(indexer.index, module.HNSWIndex)
+
+    loaded = EmbeddingIndexer(index_path=str(tmp_path / "index"))
+    assert loaded.load_index()
+    assert isinstance(loaded.index, module.HNSWIndex)
+    results = loaded.search("query", k=8, filters={"doc_id": "doc0"})
+    assert {r["doc_id"] for r in results} == {"doc0"}
+
+
+def test_load_index_converts_legacy_faiss_index(tmp_path: Path):
+    faiss = pytest.importorskip("faiss")
+    index_dir = tmp_path / "index"
+    index_dir.mkdir()
+    vectors = module._normalize_rows(np.random.default_rng(0).normal(size=(3, 384)))
+    legacy_index = faiss.IndexFlatIP(384)
+    legacy_index.add(vectors)
+    faiss.write_index(legacy_index, str(index_dir / "faiss.index"))
+    chunks = [{"doc_id": "doc1", "chunk_id": f"doc1_chunk_{i}", "chunk_index": i, "text": f"t{i}"} for i in range(3)]
+    with open(index_dir / "metadata.pkl", "wb") as f:
+        pickle.dump(chunks, f)
+
+    indexer = EmbeddingIndexer(index_path=str(index_dir))
+    assert indexer.load_index()
+    assert indexer.index.ntotal == 3
+    assert indexer.chunk_metadata.row(2)["text"] == "t2"
+    assert np.allclose(np.load(index_dir / "vectors.npy"), vectors, atol=1e-3)
+    assert (index_dir / "metadata.npz").exists()
+
+
+def test_load_index_without_metadata(tmp_path: Path):
+    index_dir = tmp_path / "index"
+    index_dir.mkdir()
+    np.save(index_dir / "vectors.npy", np.zeros((2, 384), dtype=np.float16))
+
+    indexer = EmbeddingIndexer(index_path=str(index_dir))
+    assert not indexer.load_index()
+    assert indexer.index is None
+
+
+class FakeTokenizer:
+    """Each whitespace-separated number becomes one token id; 0 is padding."""
+
+    def __call__(self, texts, **kwargs):
+        input_ids = [[int(word) for word in text.split()] for text in texts]
+        return {"input_ids": input_ids, "attention_mask": [[1] * len(ids) for ids in input_ids]}
+
+    def pad(self, features, return_tensors):
+        width = max(len(ids) for ids in features["input_ids"])
+        return {
+            name: np.array([row + [0] * (width - len(row)) for row in rows])
+            for name, rows in features.items()
+        }
+
+
+class FakeSession:
+    """Hidden state of a token is its id in both dims; padding gets a large sentinel."""
+
+    def __init__(self):
+        self.batch_widths = []
+
+    def run(self, _outputs, inputs):
+        ids = inputs["input_ids"].astype(np.float32)
+        self.batch_widths.append(ids.shape[1])
+        hidden = np.where(ids == 0, 1000.0, ids)
+        return [np.repeat(hidden[..., None], 2, axis=2)]
+
+
+def make_onnx_encoder():
+    encoder = module.OnnxEncoder.__new__(module.OnnxEncoder)
+    encoder.tokenizer = FakeTokenizer()
+    encoder.session = FakeSession()
+    encoder.input_names = {"input_ids", "attention_mask"}
+    encoder.max_seq_length = 256
+    return encoder
+
+
+def test_onnx_encoder_masked_mean_pooling():
+    encoder = make_onnx_encoder()
+    embeddings = encoder.encode(["1 2 3 4", "6"], batch_size=2)
+    # padding positions (sentinel 1000) must not enter the mean
+    assert np.allclose(embeddings, [[2.5, 2.5], [6.0, 6.0]])
+
+
+def test_onnx_encoder_length_sorted_batches_keep_input_order():
+    encoder = make_onnx_encoder()
+    texts = ["1 2 3 4 5 6", "7", "2 4 6", "9 9", "3 3 3 3 3"]
+    embeddings = encoder.encode(texts, batch_size=2)
+
+    expected = [np.mean([int(w) for w in t.split()]) for t in texts]
+    assert np.allclose(embeddings[:, 0], expected)
+    # batches are formed in token-length order: 1+2, 3+5, 6 tokens
+    assert encoder.session.batch_widths == [2, 5, 6]
+
+
+def test_build_index_inplace_normalizes_caller_buffer(tmp_path: Path):
+    embeddings = np.full((2, 384), 2.0, dtype=np.float32)
+    indexer = EmbeddingIndexer(index_path=str(tmp_path / "index"))
+    indexer.build_index(embeddings, [{"text": "a"}, {"text": "b"}], inplace=True)
+
+    assert np.allclose(np.linalg.norm(embeddings, axis=1), 1.0)
+    assert indexer.index.vectors.dtype == np.float16
+
+
+def test_save_index_does_not_disturb_mapped_readers(tmp_path: Path):
+    index_dir = str(tmp_path / "index")
+    old_chunks = [{"doc_id": "old", "chunk_index": i, "text": f"old {i}"} for i in range(4)]
+    writer = EmbeddingIndexer(index_path=index_dir)
+    writer.build_index(np.eye(4, 384), old_chunks)
+    writer.save_index()
+
+    reader = EmbeddingIndexer(index_path=index_dir)
+    assert reader.load_index()
+    before = reader.index.search(np.eye(1, 384), k=4)
+
+    # rebuild with a smaller corpus, as the orchestrator does after an upload
+    writer.build_index(-np.eye(1, 384), [{"doc_id": "new", "chunk_index": 0, "text": "new"}])
+    writer.save_index()
+
+    after = reader.index.search(np.eye(1, 384), k=4)
+    assert np.array_equal(before[1], after[1])
+    assert np.allclose(before[0], after[0])
+    assert [r["doc_id"] for r in reader.search("query", k=4)] == ["old"] * 4
+
+
+def test_hnsw_doc_filter_finds_rare_document(monkeypatch, tmp_path: Path):
+    pytest.importorskip("faiss")
+    monkeypatch.setattr(module, "ANN_MIN_VECTORS", 100)
+    n = 2000
+    chunks = [{"doc_id": "big", "chunk_index": i, "text": f"text {i}"} for i in range(n)]
+    for i in (7, 1500):
+        chunks[i]["doc_id"] = "rare"
+    indexer = EmbeddingIndexer(index_path=str(tmp_path / "index"))
+    indexer.build_index(np.random.default_rng(0).normal(size=(n, 384)), chunks)
+    assert isinstance(indexer.index, module.HNSWIndex)
+
+    results = indexer.search("query", k=5, filters={"doc_id": "rare"})
+    assert sorted(r["chunk_index"] for r in results) == [7, 1500]
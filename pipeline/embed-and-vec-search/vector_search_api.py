@@ -36,7 +36,7 @@ def index_documents():
             )
 
         embeddings = indexer.embed_chunks(chunks)
-        indexer.build_index(embeddings, chunks)
+        indexer.build_index(embeddings, chunks, inplace=True)
         indexer.save_index()
 
         logger.info("[OK] Indexing complete: %d chunks", len(chunks))
@@ -4,8 +4,15 @@ Chunking utilities for sliding-window, word-based segmentation.
 
 from __future__ import annotations
 
+import re
 from typing import List, Dict, Optional, Any
 
+import numpy as np
+
+
+# a word is a maximal run of non-whitespace, as in str.split()
+_WORD_RE = re.compile(r"\S+")
+
 
 def split_words(text: str) -> List[str]:
     """Split text into words preserving simple whitespace separation."""
@@ -33,15 +40,18 @@ def build_page_ranges(page_texts: List[Dict[str, Any]]) -> List[Dict[str, int]]:
     return ranges
 
 
-def _find_page(page_ranges: Optional[List[Dict[str, int]]], start_offset: int) -> Optional[int]:
-    """Return page number containing the start_offset based on ranges."""
+def _pages_for_offsets(page_ranges: Optional[List[Dict[str, int]]], offsets: np.ndarray) -> List[Optional[int]]:
+    """
+    Return the page number containing each word offset, in one searchsorted call
+    over the (contiguous, sorted) ranges. Offsets before the first or past the last
+    range map to the last page.
+    """
     if not page_ranges:
-        return None
-    for rng in page_ranges:
-        if rng["start_offset"] <= start_offset < rng["end_offset"]:
-            return rng["page"]
-    # If beyond last range, return last page id
-    return page_ranges[-1]["page"] if page_ranges else None
+        return [None] * len(offsets)
+    page_starts = np.array([rng["start_offset"] for rng in page_ranges])
+    page_ids = [rng["page"] for rng in page_ranges]
+    positions = np.searchsorted(page_starts, offsets, side="right") - 1
+    return [page_ids[pos] for pos in positions.tolist()]
 
 
 def chunk_text(
@@ -57,25 +67,26 @@ def chunk_text(
     Chunks follow sliding window:
       chunk_1 = words[0:chunk_size]
       chunk_2 = words[chunk_size - overlap : chunk_size - overlap + chunk_size]
+    Chunk text is sliced from the original string (from the first word's start to
+    the last word's end), so whitespace inside a chunk is kept as-is.
     """
-    words = split_words(text)
-    if not words:
+    if not text or chunk_size <= 0:
+        return []
+    word_spans = [match.span() for match in _WORD_RE.finditer(text)]
+    if not word_spans:
         return []
 
     step = max(chunk_size - overlap, 1)
-    chunks: List[Dict] = []
-
-    start = 0
-    index = 0
-    total = len(words)
+    total = len(word_spans)
 
-    while start < total:
-        end = min(start + chunk_size, total)
-        chunk_words = words[start:end]
-        if not chunk_words:
-            break
+    # window offsets and their pages, computed up front
+    starts = np.arange(0, total, step)
+    ends = np.minimum(starts + chunk_size, total)
+    pages = _pages_for_offsets(page_ranges, starts)
 
-        chunk_text_str = " ".join(chunk_words)
+    chunks: List[Dict] = []
+    for index, (start, end, page) in enumerate(zip(starts.tolist(), ends.tolist(), pages)):
+        chunk_text_str = text[word_spans[start][0] : word_spans[end - 1][1]]
         chunks.append(
             {
                 "doc_id": doc_id,
@@ -84,12 +95,8 @@ def chunk_text(
                 "start_offset": start,
                 "end_offset": end,
                 "source": source,
-                "page": _find_page(page_ranges, start),
+                "page": page,
             }
         )
 
-        index += 1
-        start += step
-
     return chunks
-
@@ -5,9 +5,16 @@ Supports PDF (with OCR fallback), DOCX, and TXT inputs.
 
 from __future__ import annotations
 
+import multiprocessing
+import os
 import re
+import subprocess
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack
+from itertools import chain, repeat
 from pathlib import Path
-from typing import List, Tuple, Dict
+from typing import List, Tuple, Dict, Optional
 
 import pdfplumber
 import pytesseract
@@ -15,6 +22,14 @@ from docx import Document
 from PIL import Image
 
 
+# \s already covers \r, so one substitution normalizes all whitespace
+_WHITESPACE_RE = re.compile(r"\s+")
+
+# a spawned worker re-imports the caller's modules (~1s); below this many pages per
+# worker, extracting serially in-process is faster
+MIN_PAGES_PER_WORKER = 16
+
+
 def detect_file_type(file_path: str | Path) -> str:
     """
     Detect supported file type based on extension.
@@ -39,30 +54,124 @@ def clean_text(text: str) -> str:
     """
     if not text:
         return ""
-    text = text.replace("\r", " ")
-    text = re.sub(r"\s+", " ", text)
-    return text.strip()
+    return _WHITESPACE_RE.sub(" ", text).strip()
 
 
-def _extract_pdf(file_path: Path) -> Tuple[str, List[Dict[str, str]]]:
-    full_text_parts: List[str] = []
-    page_texts: List[Dict[str, str]] = []
+def _available_cpus() -> int:
+    """CPUs this process may run on (respects affinity / container cpusets)."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:  # not available on macOS / Windows
+        return os.cpu_count() or 1
+
+
+def _pdf_workers(page_count: int) -> int:
+    """Number of extraction processes for a PDF; 1 means run serially in-process."""
+    return max(min(_available_cpus(), page_count // MIN_PAGES_PER_WORKER), 1)
+
+
+def _extract_pdf_page(page, image_dir: str) -> Tuple[int, str, Optional[str]]:
+    """
+    Extract text from one open pdfplumber page. Scanned or empty pages are rendered
+    to a PNG in image_dir for batched OCR and their path is returned instead.
+    """
+    page_number = page.page_number
+    text = clean_text(page.extract_text() or "")
+    if text:
+        return page_number, text, None
 
-    with pdfplumber.open(file_path) as pdf:
-        for idx, page in enumerate(pdf.pages, start=1):
-            text = page.extract_text() or ""
-            text = clean_text(text)
+    image_path = os.path.join(image_dir, f"page_{page_number}.png")
+    pil_image: Image.Image = page.to_image(resolution=300).original
+    pil_image.save(image_path, compress_level=1)
+    return page_number, "", image_path
 
-            if not text:
-                # OCR fallback for scanned or empty pages
-                page_image = page.to_image(resolution=300)
-                pil_image: Image.Image = page_image.original
-                text = clean_text(pytesseract.image_to_string(pil_image))
 
-            page_texts.append({"page": idx, "text": text})
-            full_text_parts.append(text)
+def _extract_pdf_range(file_path: Path, first: int, last: int, image_dir: str) -> List[Tuple[int, str, Optional[str]]]:
+    """
+    Extract the contiguous (1-based, inclusive) page range first..last, opening the
+    PDF once. Runs in a worker process.
+    """
+    with pdfplumber.open(file_path, pages=list(range(first, last + 1))) as pdf:
+        return [_extract_pdf_page(page, image_dir) for page in pdf.pages]
 
-    full_text = clean_text(" ".join(full_text_parts))
+
+def _ocr_images(image_paths: List[str]) -> List[str]:
+    """
+    OCR several images with a single tesseract process (list-file input).
+    Tesseract ends every page of the output with a form feed. It skips images it
+    cannot read, so if the page count does not match, fall back to one OCR call per
+    image rather than attribute text to the wrong pages.
+    """
+    base = os.path.splitext(image_paths[0])[0]
+    list_file = base + "_list.txt"
+    output_base = base + "_ocr"
+    Path(list_file).write_text("\n".join(image_paths) + "\n", encoding="utf-8")
+
+    subprocess.run(
+        [pytesseract.pytesseract.tesseract_cmd, list_file, output_base],
+        check=True,
+        capture_output=True,
+    )
+    output = Path(output_base + ".txt").read_text(encoding="utf-8", errors="ignore")
+    if output.endswith("\f"):
+        output = output[:-1]
+    parts = output.split("\f")
+    if len(parts) == len(image_paths):
+        return [clean_text(part) for part in parts]
+
+    texts = []
+    for image_path in image_paths:
+        with Image.open(image_path) as img:
+            texts.append(clean_text(pytesseract.image_to_string(img)))
+    return texts
+
+
+def _extract_pdf(file_path: Path) -> Tuple[str, List[Dict[str, str]]]:
+    texts: Dict[int, str] = {}
+
+    with ExitStack() as stack:
+        image_dir = stack.enter_context(tempfile.TemporaryDirectory())
+        pdf = stack.enter_context(pdfplumber.open(file_path))
+        page_count = len(pdf.pages)
+        workers = _pdf_workers(page_count)
+
+        # pass 1: text layer per page, rendering scanned pages for OCR
+        if workers > 1:
+            # pages are independent and CPU-bound: fan contiguous page ranges out
+            # across processes, each opening the PDF once. spawn, because callers
+            # such as the threaded Flask orchestrator must not be forked.
+            executor = stack.enter_context(
+                ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            )
+            mapper = executor.map
+            size = -(-page_count // workers)
+            firsts = range(1, page_count + 1, size)
+            lasts = [min(first + size - 1, page_count) for first in firsts]
+            results = chain.from_iterable(
+                mapper(_extract_pdf_range, repeat(file_path), firsts, lasts, repeat(image_dir))
+            )
+        else:
+            # serial: reuse the already open document
+            mapper = map
+            results = (_extract_pdf_page(page, image_dir) for page in pdf.pages)
+
+        scanned: List[Tuple[int, str]] = []
+        for number, text, image_path in results:
+            texts[number] = text
+            if image_path:
+                scanned.append((number, image_path))
+
+        # pass 2: OCR fallback, one tesseract invocation per worker batch
+        batches = [scanned[i::workers] for i in range(min(workers, len(scanned)))]
+        batch_texts = mapper(_ocr_images, [[path for _, path in batch] for batch in batches])
+        for batch, ocr_texts in zip(batches, batch_texts):
+            for (number, _), text in zip(batch, ocr_texts):
+                texts[number] = text
+
+    page_numbers = range(1, page_count + 1)
+    page_texts: List[Dict[str, str]] = [{"page": number, "text": texts[number]} for number in page_numbers]
+    # page texts are already cleaned; skip empty pages so no double spaces appear
+    full_text = " ".join(entry["text"] for entry in page_texts if entry["text"])
     return full_text, page_texts
 
 
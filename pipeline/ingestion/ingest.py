@@ -13,7 +13,7 @@ from pathlib import Path
 
 from chunker import chunk_text, build_page_ranges
 from extractor import extract_text
-from utils import generate_doc_id, save_chunk
+from utils import generate_doc_id, save_chunks
 
 
 def main() -> None:
@@ -35,10 +35,8 @@ def main() -> None:
         print(f"[error] Extraction failed: {exc}")
         sys.exit(1)
 
-    for idx, chunk in enumerate(chunks):
-        save_chunk(doc_id, idx, chunk)
+    output_file = save_chunks(doc_id, chunks)
 
-    output_folder = Path("storage") / "chunks" / doc_id
     print("Ingestion summary")
     print("-----------------")
     print(f"doc_id: {doc_id}")
@@ -46,7 +44,7 @@ def main() -> None:
     print(f"total_chars: {len(full_text)}")
     print(f"pages: {len(page_texts)}")
     print(f"chunks: {len(chunks)}")
-    print(f"output: {output_folder.resolve()}")
+    print(f"output: {output_file.resolve()}")
 
 
 if __name__ == "__main__":
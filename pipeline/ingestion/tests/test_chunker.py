@@ -1,3 +1,5 @@
+import numpy as np
+
 from ingestion import chunker
 
 
@@ -24,3 +26,32 @@ def test_chunk_text_with_overlap():
     assert chunks[1]["start_offset"] == 3  # chunk_size - overlap
     assert chunks[0]["page"] is None
 
+
+
+def test_chunk_text_assigns_pages():
+    pages = [
+        {"page": 1, "text": "a b c d"},
+        {"page": 2, "text": ""},
+        {"page": 3, "text": "e f g h"},
+    ]
+    ranges = chunker.build_page_ranges(pages)
+    text = " ".join(p["text"] for p in pages if p["text"])
+    chunks = chunker.chunk_text(text, doc_id="doc1", chunk_size=3, overlap=1, page_ranges=ranges)
+    offsets = np.array([c["start_offset"] for c in chunks])
+    assert [c["page"] for c in chunks] == chunker._pages_for_offsets(ranges, offsets)
+    assert [c["page"] for c in chunks] == [1, 1, 3, 3]
+
+
+def test_pages_for_offsets_bounds():
+    ranges = [
+        {"page": 1, "start_offset": 0, "end_offset": 2},
+        {"page": 2, "start_offset": 2, "end_offset": 3},
+    ]
+    assert chunker._pages_for_offsets(ranges, np.array([0, 1, 2, 10])) == [1, 1, 2, 2]
+    assert chunker._pages_for_offsets(None, np.array([0])) == [None]
+
+
+def test_chunk_text_slices_original_text():
+    text = "alpha  beta\ngamma delta epsilon"
+    chunks = chunker.chunk_text(text, doc_id="doc1", chunk_size=3, overlap=1)
+    assert [c["text"] for c in chunks] == ["alpha  beta\ngamma", "gamma delta epsilon", "epsilon"]
@@ -17,6 +17,7 @@ def test_detect_file_type_unsupported():
 def test_clean_text():
   assert extractor.clean_text("  hello   world  ") == "hello world"
   assert extractor.clean_text("") == ""
+  assert extractor.clean_text("a\r\nb\t\r c") == "a b c"
 
 
 def test_extract_text_txt(sample_txt_file: Path):
@@ -31,3 +32,119 @@ def test_extract_text_invalid(tmp_path: Path):
   with pytest.raises(ValueError):
     extractor.extract_text(bad_file)
 
+
+
+class FakePage:
+  def __init__(self, page_number, text):
+    self.page_number = page_number
+    self.text = text
+
+  def extract_text(self):
+    return self.text
+
+  def to_image(self, resolution):
+    page = self
+
+    class Rendered:
+      class original:
+        @staticmethod
+        def save(path, **kwargs):
+          Path(path).write_text(f"image of page {page.page_number}")
+
+    return Rendered
+
+
+class FakePdf:
+  def __init__(self, page_texts, pages=None):
+    numbers = pages or range(1, len(page_texts) + 1)
+    self.pages = [FakePage(n, page_texts[n - 1]) for n in numbers]
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, *exc):
+    return False
+
+
+def fake_tesseract(args, **kwargs):
+  # OCR "result" of each listed image is its file content, pages separated by \f
+  _, list_file, output_base = args
+  images = Path(list_file).read_text(encoding="utf-8").split()
+  Path(output_base + ".txt").write_text("\f".join(Path(p).read_text() for p in images) + "\f")
+
+
+@pytest.fixture
+def fake_pdf(monkeypatch):
+  page_texts = ["first page", "", "third page", "", ""]
+  opened = []
+
+  def fake_open(path, pages=None):
+    opened.append(pages)
+    return FakePdf(page_texts, pages)
+
+  monkeypatch.setattr(extractor.pdfplumber, "open", fake_open)
+  monkeypatch.setattr(extractor.subprocess, "run", fake_tesseract)
+  return opened
+
+
+def test_extract_pdf_serial_mixes_text_and_ocr_pages(fake_pdf, monkeypatch):
+  monkeypatch.setattr(extractor, "_available_cpus", lambda: 1)
+  full_text, pages = extractor.extract_text("doc.pdf")
+
+  assert [p["page"] for p in pages] == [1, 2, 3, 4, 5]
+  assert [p["text"] for p in pages] == [
+    "first page", "image of page 2", "third page", "image of page 4", "image of page 5",
+  ]
+  assert full_text == " ".join(p["text"] for p in pages)
+  assert fake_pdf == [None]  # serial path opens the document once
+
+
+def test_extract_pdf_range_keeps_page_numbers(fake_pdf, tmp_path: Path):
+  results = extractor._extract_pdf_range(Path("doc.pdf"), 2, 4, str(tmp_path))
+  assert [(number, text) for number, text, _ in results] == [(2, ""), (3, "third page"), (4, "")]
+  assert [Path(p).name for _, _, p in results if p] == ["page_2.png", "page_4.png"]
+  assert fake_pdf == [[2, 3, 4]]
+
+
+def test_ocr_images_splits_pages_in_order(tmp_path: Path, monkeypatch):
+  images = []
+  for i, content in enumerate(["alpha\n", "", "gamma  text"]):
+    image = tmp_path / f"page_{i + 1}.png"
+    image.write_text(content)
+    images.append(str(image))
+  monkeypatch.setattr(extractor.subprocess, "run", fake_tesseract)
+
+  assert extractor._ocr_images(images) == ["alpha", "", "gamma text"]
+
+
+def test_ocr_images_falls_back_when_pages_are_skipped(tmp_path: Path, monkeypatch):
+  images = [str(tmp_path / f"page_{i}.png") for i in (1, 2, 3)]
+
+  def skipping_tesseract(args, **kwargs):
+    # page 2 was unreadable: only two pages in the output
+    Path(args[2] + ".txt").write_text("one\ftwo\f")
+
+  class FakeImage:
+    def __init__(self, path):
+      self.path = path
+
+    def __enter__(self):
+      return self
+
+    def __exit__(self, *exc):
+      return False
+
+  monkeypatch.setattr(extractor.subprocess, "run", skipping_tesseract)
+  monkeypatch.setattr(extractor.Image, "open", FakeImage)
+  monkeypatch.setattr(extractor.pytesseract, "image_to_string", lambda img: f"ocr {Path(img.path).stem}")
+
+  assert extractor._ocr_images(images) == ["ocr page_1", "ocr page_2", "ocr page_3"]
+
+
+def test_pdf_workers_runs_small_pdfs_serially(monkeypatch):
+  monkeypatch.setattr(extractor, "_available_cpus", lambda: 8)
+  per_worker = extractor.MIN_PAGES_PER_WORKER
+  assert extractor._pdf_workers(1) == 1
+  assert extractor._pdf_workers(2 * per_worker - 1) == 1
+  assert extractor._pdf_workers(2 * per_worker) == 2
+  assert extractor._pdf_workers(100 * per_worker) == 8
@@ -1,3 +1,4 @@
+import json
 from pathlib import Path
 from ingestion import utils
 
@@ -16,3 +17,10 @@ def test_save_chunk(tmp_path: Path):
     data = path.read_text()
     assert "hello" in data
 
+
+def test_save_chunks_jsonl(tmp_path: Path):
+    chunks = [{"doc_id": "doc1", "chunk_index": i, "text": f"hello {i}"} for i in range(3)]
+    path = utils.save_chunks("doc1", chunks, base_dir=tmp_path)
+    assert path == tmp_path / "doc1.jsonl"
+    lines = path.read_text(encoding="utf-8").splitlines()
+    assert [json.loads(line) for line in lines] == chunks
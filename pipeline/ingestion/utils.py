@@ -4,11 +4,12 @@ Utility helpers for ingestion pipeline.
 
 from __future__ import annotations
 
-import json
 import os
-import uuid
+import secrets
 from pathlib import Path
-from typing import Any
+from typing import Any, Iterable
+
+import orjson
 
 
 # Base storage directory (relative to pipeline root)
@@ -17,8 +18,8 @@ STORAGE_DIR = PIPELINE_ROOT / "storage"
 
 
 def generate_doc_id() -> str:
-    """Generate a unique hex document identifier."""
-    return uuid.uuid4().hex
+    """Generate a unique 32-character hex document identifier."""
+    return secrets.token_hex(16)
 
 
 def ensure_folder(path: str | Path) -> None:
@@ -57,9 +58,28 @@ def save_chunk(doc_id: str, chunk_index: int, chunk_data: Any, base_dir: Path |
         base_dir = Path(base_dir) / doc_id
     
     ensure_folder(base_dir)
-
     file_path = base_dir / f"chunk_{chunk_index}.json"
-    with file_path.open("w", encoding="utf-8") as f:
-        json.dump(chunk_data, f, ensure_ascii=False, indent=2)
+    file_path.write_bytes(orjson.dumps(chunk_data, option=orjson.OPT_INDENT_2))
+    return file_path
+
+
+def save_chunks(doc_id: str, chunks: Iterable[Any], base_dir: Path | None = None) -> Path:
+    """
+    Save all chunks of a document to storage/chunks/<doc_id>.jsonl (one JSON object
+    per line, in chunk order). One sequential file per document instead of one file
+    per chunk. Returns the path to the saved file.
+
+    Args:
+        doc_id: Document identifier
+        chunks: Chunk data to save
+        base_dir: Optional base directory override
+    """
+    base_dir = get_chunks_dir() if base_dir is None else Path(base_dir)
+    ensure_folder(base_dir)
+
+    file_path = base_dir / f"{doc_id}.jsonl"
+    with file_path.open("wb") as f:
+        for chunk in chunks:
+            f.write(orjson.dumps(chunk, option=orjson.OPT_APPEND_NEWLINE))
 
     return file_path
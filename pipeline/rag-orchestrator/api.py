@@ -52,7 +52,7 @@ def process_uploaded_file(file) -> dict:
     """
     from ingestion.extractor import extract_text
     from ingestion.chunker import chunk_text, build_page_ranges
-    from ingestion.utils import generate_doc_id, save_chunk
+    from ingestion.utils import generate_doc_id, save_chunks
     
     # Save file temporarily
     filename = secure_filename(file.filename)
@@ -84,8 +84,7 @@ def process_uploaded_file(file) -> dict:
         logger.info(f"Created {len(chunks)} chunks")
         
         # Save chunks
-        for idx, chunk in enumerate(chunks):
-            save_chunk(doc_id, idx, chunk)
+        save_chunks(doc_id, chunks)
         
         logger.info(f"Processed file {filename}: doc_id={doc_id}, chunks={len(chunks)}")
         
@@ -126,7 +125,7 @@ def reindex_vectors():
         chunks = indexer.load_chunks(chunks_dir)
         if chunks:
             embeddings = indexer.embed_chunks(chunks)
-            indexer.build_index(embeddings, chunks)
+            indexer.build_index(embeddings, chunks, inplace=True)
             indexer.save_index()
             logger.info(f"Re-indexed {len(chunks)} chunks")
             return len(chunks)